@@ -1,32 +1,34 @@
+import asyncio
 import logging
 import threading
 
+from queue import Queue
 from unittest import skipIf
 
-from six import b
-from six.moves.queue import Queue
-
-from testtools import (
-    TestCase,
-    try_import,
+from testtools import TestCase
+from testtools.matchers import (
+    Contains,
+    MatchesAll,
+    Not,
 )
 from testtools.monkey import MonkeyPatcher
 
-from fixtures import FakeLogger
-
+from twisted.internet.task import deferLater
 from twisted.internet.utils import getProcessOutput
 from twisted.internet.epollreactor import EPollReactor
 
-from txfixtures._twisted.threading import CallFromThreadTimeout
-
 from txfixtures.reactor import Reactor
 
-TIMEOUT = 5
+from tests.testing import SharedLoggerMixin
 
-asyncio = try_import("asyncio")
+try:
+    from twisted.internet.asyncioreactor import AsyncioSelectorReactor
+except ImportError:
+    HAS_ASYNCIO_REACTOR = False
+else:
+    HAS_ASYNCIO_REACTOR = True
 
-AsyncioSelectorReactor = try_import(
-    "twisted.internet.asyncioreactor.AsyncioSelectorReactor")
+TIMEOUT = 5
 
 
 class ReactorPatcher(MonkeyPatcher):
@@ -49,25 +51,31 @@ class ReactorPatcher(MonkeyPatcher):
 
         self.callFromThreadTimeout = None
 
+        # The callFromThread implementation currently in use. It gets switched
+        # to _faultyCallFromThread only when some fault gets scheduled, so
+        # calls are passed straight through to the original method otherwise.
+        self._callFromThreadImpl = self._originalCallFromThread
+
     def scheduleCrash(self, abruptly=False):
         """
-        When the reactor is run, it will hang until a value is put into the
-        `crashingDo` queue, and then crash.
+        When the reactor is run, it will hang until the `crashingDo` event is
+        set, and then crash.
 
         :param abruptly: If True, then crash badly by simply exiting the
             thread, without even calling reactor.crash().
         """
-        self.crashingDo = Queue()
-        self.crashingNotify = Queue()
+        self.crashingDo = threading.Event()
+        self.crashingNotify = threading.Event()
         self.crashingAbruptly = abruptly
+        self._callFromThreadImpl = self._faultyCallFromThread
         return self.crashingDo
 
     def scheduleHang(self):
         """
-        When the reactor is run, hang until a value is put into the
-        `hangingDo` queue.
+        When the reactor is run, hang until the `hangingDo` event is set.
         """
-        self.hangingDo = Queue()
+        self.hangingDo = threading.Event()
+        self._callFromThreadImpl = self._faultyCallFromThread
         return self.hangingDo
 
     def scheduleCallFromThreadTimeout(self, function):
@@ -76,15 +84,16 @@ class ReactorPatcher(MonkeyPatcher):
         it timeout.
         """
         self.callFromThreadTimeout = function
+        self._callFromThreadImpl = self._faultyCallFromThread
 
     def restore(self):
         """Restore the original reactor methods."""
         super(ReactorPatcher, self).restore()
         logging.info("Restoring reactor")
         if self.hangingDo:
-            self.hangingDo.put(None)
+            self.hangingDo.set()
         if self.crashingDo:
-            self.crashingDo.put(None)
+            self.crashingDo.set()
         self.reactor.crash()
 
     def _mainLoop(self):
@@ -102,23 +111,26 @@ class ReactorPatcher(MonkeyPatcher):
         logging.info("Hanging reactor")
         if self.crashingDo:
             self._waitAndCrash()
-        logging.info("Waiting for hang queue")
-        self.hangingDo.get(timeout=TIMEOUT)
+        logging.info("Waiting for hang event")
+        assert self.hangingDo.wait(timeout=TIMEOUT), "Hang event not set"
         logging.info("Resuming hung main loop")
         self.hangingDo = None
 
     def _waitAndCrash(self):
-        logging.info("Waiting for crash queue")
-        self.crashingDo.get(timeout=TIMEOUT)
+        logging.info("Waiting for crash event")
+        assert self.crashingDo.wait(timeout=TIMEOUT), "Crash event not set"
         abruptely = " abruptely" if self.crashingAbruptly else ""
         logging.info("Crashing main loop%s", abruptely)
         if not self.crashingAbruptly:
             self.reactor.crash()
         # Notify that we have successfully crashed
-        self.crashingNotify.put(None)
+        self.crashingNotify.set()
         self.crashingDo = None
 
     def _callFromThread(self, f, *args, **kwargs):
+        return self._callFromThreadImpl(f, *args, **kwargs)
+
+    def _faultyCallFromThread(self, f, *args, **kwargs):
 
         # We assume here that the only potential caller of the
         # reactor.callFromThread API is the interruptableCallFromThread
@@ -127,19 +139,22 @@ class ReactorPatcher(MonkeyPatcher):
         # code under test).
         #
         # The arguments that interruptableCallFromThread passes to
-        # reactor.callFromThread are 2:
+        # reactor.callFromThread are 4:
         #
-        # - the queue to use for timing out the call
+        # - the slot to use for handing over the result and for timing out
+        #   the call
         # - the function to call in the main thread
+        # - the positional and keyword arguments to call it with
         #
         # Here we check if the function argument matches the function that
         # we want to timeout.
         if args[1] == self.callFromThreadTimeout:
             logging.info("Trigger callFromThread timeout")
 
-            def timeout(timeout=None):
-                raise CallFromThreadTimeout()
-            args[0].get = timeout
+            class TimedOutEvent(object):
+                def wait(self, timeout=None):
+                    return False
+            args[0].event = TimedOutEvent()
             return
 
         elif self.hangingDo or self.crashingDo:
@@ -152,11 +167,10 @@ class ReactorPatcher(MonkeyPatcher):
         self._originalCallFromThread(f, *args, **kwargs)
 
 
-class ReactorIntegrationTest(TestCase):
+class ReactorIntegrationTest(SharedLoggerMixin, TestCase):
 
     def setUp(self):
         super(ReactorIntegrationTest, self).setUp()
-        self.logger = self.useFixture(FakeLogger())
         self.reactor = EPollReactor()
         self.fixture = Reactor(self.reactor)
         self.patcher = ReactorPatcher(self.fixture.reactor)
@@ -171,12 +185,28 @@ class ReactorIntegrationTest(TestCase):
             self.fixture.thread.join(timeout=TIMEOUT)
             assert not self.fixture.thread.is_alive(), "Thread did not stop"
 
+    def _setUpHungThread(self):
+        """Set up the fixture and leave its thread alive but hung.
+
+        The reactor gets crashed while its main loop is patched to keep the
+        thread around, so the thread is alive but the reactor isn't running.
+        """
+        self.patcher.patch()
+        self.patcher.scheduleHang()
+        self.patcher.scheduleCrash()
+        self.fixture.setUp()
+        self.patcher.crashingDo.set()
+        self.assertTrue(self.patcher.crashingNotify.wait(timeout=TIMEOUT))
+
+        self.assertTrue(self.fixture.thread.is_alive())
+        self.assertFalse(self.reactor.running)
+
     def test_reactor_running(self):
         """After setUp is run, the reactor is spinning."""
         self.useFixture(self.fixture)
         self.assertTrue(self.reactor.running)
 
-    @skipIf(not AsyncioSelectorReactor, "asyncio reactor not available")
+    @skipIf(not HAS_ASYNCIO_REACTOR, "asyncio reactor not available")
     def test_asyncio_reactor(self):
         """It's possible to start a custom reactor, like the asyncio one."""
         eventloop = asyncio.new_event_loop()
@@ -191,22 +221,31 @@ class ReactorIntegrationTest(TestCase):
 
     def test_separate_thread(self):
         """The reactor runs in a separate thread."""
+        before = set(threading.enumerate())
         self.useFixture(self.fixture)
-        # Figure the number of active threads, excluding the twisted thread
-        # pool.
-        threads = []
-        for thread in threading.enumerate():
-            if thread.name.startswith("PoolThread-twisted.internet.reactor"):
-                continue
-            threads.append(thread)
-        self.assertEqual(2, len(threads))
+        # Figure the threads that were started by the fixture, excluding the
+        # twisted thread pool.
+        threads = [
+            thread for thread in threading.enumerate()
+            if thread not in before and not thread.name.startswith(
+                "PoolThread-twisted.internet.reactor")]
+        self.assertEqual([self.fixture.thread], threads)
 
     def test_call(self):
         """The call() method is a convenience around blockingFromThread."""
         self.useFixture(self.fixture)
         output = self.fixture.call(
-            TIMEOUT, getProcessOutput, b("uptime"), reactor=self.reactor)
-        self.assertIn(b("load average"), output)
+            TIMEOUT, deferLater, self.reactor, 0, lambda: "hello")
+        self.assertEqual("hello", output)
+
+    def test_call_spawn_process(self):
+        """
+        The call() method can drive asynchronous APIs that spawn processes.
+        """
+        self.useFixture(self.fixture)
+        output = self.fixture.call(
+            TIMEOUT, getProcessOutput, b"uptime", reactor=self.reactor)
+        self.assertIn(b"load average", output)
 
     def test_reset_thread_and_reactor_died(self):
         """
@@ -232,7 +271,7 @@ class ReactorIntegrationTest(TestCase):
         self.patcher.patch()
         self.patcher.scheduleCrash(abruptly=True)
         self.useFixture(self.fixture)
-        self.patcher.crashingDo.put(None)
+        self.patcher.crashingDo.set()
 
         # At this point the thread should be dead and the reactor broken
         self.fixture.thread.join(TIMEOUT)
@@ -241,12 +280,10 @@ class ReactorIntegrationTest(TestCase):
 
         self.fixture.reset()
 
-        self.assertIn(
-            "Twisted reactor thread died, trying to recover",
-            self.logger.output)
-        self.assertIn(
-            "Twisted reactor has broken state, trying to reset",
-            self.logger.output)
+        self.assertThat(self.logger.output, MatchesAll(
+            Contains("Twisted reactor thread died, trying to recover"),
+            Contains("Twisted reactor has broken state, trying to reset"),
+        ))
 
         # Things should be back to normality
         self.assertTrue(self.fixture.thread.is_alive(), "Thread did not resume")
@@ -258,16 +295,7 @@ class ReactorIntegrationTest(TestCase):
         The reset() method bails out if the thread is alive but the reactor
         doesn't appear to be running.
         """
-        self.patcher.patch()
-        self.patcher.scheduleHang()
-        self.patcher.scheduleCrash()
-        self.fixture.setUp()
-        self.patcher.crashingDo.put(None)
-        self.patcher.crashingNotify.get(timeout=TIMEOUT)
-
-        # At this point the thread should be alive and the reactor broken
-        self.assertTrue(self.fixture.thread.is_alive())
-        self.assertFalse(self.reactor.running)
+        self._setUpHungThread()
 
         error = self.assertRaises(RuntimeError, self.fixture.reset)
         self.assertEqual("Hung reactor thread detected", str(error))
@@ -290,28 +318,19 @@ class ReactorIntegrationTest(TestCase):
 
         # There's only the entry about starting the thread, since upon cleanup
         # nothing was running.
-        self.assertNotIn(
-            "Stopping Twisted reactor and wait for its thread",
-            self.logger.output)
-        self.assertNotIn(
-            "Twisted reactor has broken state, trying to reset",
-            self.logger.output)
+        self.assertThat(self.logger.output, MatchesAll(
+            Not(Contains(
+                "Stopping Twisted reactor and wait for its thread")),
+            Not(Contains(
+                "Twisted reactor has broken state, trying to reset")),
+        ))
 
     def test_cleanup_hung_thread(self):
         """
         If cleanUp() detects a hung thread with no reactor running, an error
         is raised.
         """
-        self.patcher.patch()
-        self.patcher.scheduleHang()
-        self.patcher.scheduleCrash()
-        self.fixture.setUp()
-        self.patcher.crashingDo.put(None)
-        self.patcher.crashingNotify.get(timeout=TIMEOUT)
-
-        # At this point the thread should be alive and the reactor stopped
-        self.assertTrue(self.fixture.thread.is_alive())
-        self.assertFalse(self.reactor.running)
+        self._setUpHungThread()
 
         error = self.assertRaises(RuntimeError, self.fixture.cleanUp)
         self.assertEqual("Hung reactor thread detected", str(error))
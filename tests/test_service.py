@@ -3,10 +3,13 @@ import signal
 import socket
 
 from testtools import TestCase
+from testtools.matchers import (
+    Contains,
+    MatchesAll,
+)
 from testtools.twistedsupport import AsynchronousDeferredRunTest
 
 from fixtures import (
-    FakeLogger,
     MultipleExceptions,
     TempDir
 )
@@ -24,22 +27,25 @@ from twisted.internet.error import (
 )
 
 from txfixtures._twisted.backports.defer import addTimeout
-from txfixtures.reactor import Reactor
 from txfixtures.service import (
     Service,
     ServiceProtocol,
 )
 
+from tests.testing import (
+    ReusableExecutable,
+    SharedLoggerMixin,
+    SharedReactorMixin,
+)
+
 
-class ServiceIntegrationTest(TestCase):
+class ServiceIntegrationTest(SharedReactorMixin, TestCase):
 
     def setUp(self):
         super(ServiceIntegrationTest, self).setUp()
-        self.logger = self.useFixture(FakeLogger())
         self.script = self.useFixture(FakeExecutable())
-        reactor = self.useFixture(Reactor())
         command = self.script.path.encode("utf-8")
-        self.fixture = Service(reactor, command)
+        self.fixture = Service(self.reactor, command)
 
     def test_service_ready(self):
         """After setUp is run, the service is fully ready."""
@@ -81,16 +87,28 @@ class ServiceIntegrationTest(TestCase):
             self.logger.output)
 
 
-class ServiceProtocolIntegrationTest(TestCase):
+class ServiceProtocolIntegrationTest(SharedLoggerMixin, TestCase):
 
     run_tests_with = AsynchronousDeferredRunTest.make_factory(timeout=5)
 
+    @classmethod
+    def setUpClass(cls):
+        super(ServiceProtocolIntegrationTest, cls).setUpClass()
+        # Create the executable only once, and just rewrite its script
+        # before each test.
+        cls.script = ReusableExecutable()
+        cls.script.setUp()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.script.cleanUp()
+        super(ServiceProtocolIntegrationTest, cls).tearDownClass()
+
     def setUp(self):
         super(ServiceProtocolIntegrationTest, self).setUp()
-        self.logger = self.useFixture(FakeLogger())
         self.protocol = ServiceProtocol(reactor)
         self.process = None
-        self.script = self.useFixture(FakeExecutable())
+        self.script.reset()
 
     def tearDown(self):
         super(ServiceProtocolIntegrationTest, self).tearDown()
@@ -150,8 +168,10 @@ class ServiceProtocolIntegrationTest(TestCase):
         self.process = reactor.spawnProcess(
             self.protocol, self.script.path, [self.script.path])
         yield self.protocol.ready
-        self.assertIn("Service port probe failed", self.logger.output)
-        self.assertIn("Service opened port", self.logger.output)
+        self.assertThat(self.logger.output, MatchesAll(
+            Contains("Service port probe failed"),
+            Contains("Service opened port"),
+        ))
 
     @inlineCallbacks
     def test_no_min_uptime(self):
@@ -217,7 +237,7 @@ class ServiceProtocolIntegrationTest(TestCase):
 
         # Find an unused port
         sock = socket.socket()
-        sock.bind(("localhost", 0))
+        sock.bind(("127.0.0.1", 0))
         self.addCleanup(sock.close)
         _, self.protocol.expectedPort = sock.getsockname()
 
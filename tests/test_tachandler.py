@@ -5,16 +5,17 @@
 
 __metaclass__ = type
 
+import errno
 import os
 
 from os.path import (
     dirname,
-    exists,
     join,
     )
-import subprocess
 import warnings
 
+from unittest import skipIf
+
 from fixtures import TempDir
 import testtools
 from testtools.matchers import (
@@ -29,52 +30,88 @@ from txfixtures.tachandler import (
     )
 from txfixtures.osutils import (
     get_pid_from_file,
+    pidfd_open_or_none,
+    wait_pidfd,
     )
 
 
+# The twistd script to use, typically set by tox (see tox.ini).
+TWISTD_SCRIPT = os.environ.get("TWISTD_SCRIPT")
+
+
 class SimpleTac(TacTestFixture):
 
+    # Shadow the properties of the base class, so they can be plain
+    # attributes computed once in __init__.
+    root = dirname(__file__)
+    tacfile = pidfile = logfile = daemon_port = None
+
     def __init__(self, name, tempdir, port):
         super(SimpleTac, self).__init__()
         self.name, self.tempdir = name, tempdir
-        self.port = port
+        self.tacfile = join(self.root, '%s.tac' % name)
+        self.pidfile = join(tempdir, '%s.pid' % name)
+        self.logfile = join(tempdir, '%s.log' % name)
+        self.daemon_port = port
 
     def setUp(self):
-        # The TWISTD_SCRIPT environment variable gets typically
-        # set by tox (see tox.ini).
-        super(SimpleTac, self).setUp(
-            twistd_script=os.environ.get("TWISTD_SCRIPT"))
-
-    @property
-    def root(self):
-        return dirname(__file__)
+        super(SimpleTac, self).setUp(twistd_script=TWISTD_SCRIPT)
 
-    @property
-    def tacfile(self):
-        return join(self.root, '%s.tac' % self.name)
+    def setUpRoot(self):
+        pass
 
-    @property
-    def pidfile(self):
-        return join(self.tempdir, '%s.pid' % self.name)
 
-    @property
-    def logfile(self):
-        return join(self.tempdir, '%s.log' % self.name)
+def _is_alive(pid):
+    """Return True if the process with the given pid is running.
+
+    A process file descriptor becomes readable once the process has exited
+    (even if it wasn't reaped yet), and it can't be fooled by pid reuse.
+    """
+    try:
+        pidfd = pidfd_open_or_none(pid)
+    except OSError as e:
+        if e.errno == errno.ESRCH:
+            return False
+        raise
+    if pidfd is None:
+        try:
+            os.stat("/proc/%d" % pid)
+        except FileNotFoundError:
+            return False
+        return True
+    try:
+        return not wait_pidfd(pidfd, 0)
+    finally:
+        os.close(pidfd)
+
+
+def _find_dead_pid():
+    """Return a pid that doesn't belong to any running process.
+
+    Start from the highest pid the kernel can allocate, which is very
+    unlikely to be in use.
+    """
+    with open("/proc/sys/kernel/pid_max") as fd:
+        pid = int(fd.read()) - 1
+    while _is_alive(pid):
+        pid -= 1
+    return pid
 
-    @property
-    def daemon_port(self):
-        return self.port
 
-    def setUpRoot(self):
-        pass
+class IsRunning(Matcher):
+    """Ensures the `TacTestFixture`'s process is running.
 
+    The pid is remembered once it has been read from the pid file, so the
+    same matcher can later check that this very process has stopped.
+    """
 
-class IsRunning(Matcher):
-    """Ensures the `TacTestFixture`'s process is running."""
+    def __init__(self):
+        self._pid = None
 
     def match(self, fixture):
-        pid = get_pid_from_file(fixture.pidfile)
-        if pid is None or not exists("/proc/%d" % pid):
+        if self._pid is None:
+            self._pid = get_pid_from_file(fixture.pidfile)
+        if self._pid is None or not _is_alive(self._pid):
             return Mismatch("Fixture %r is not running." % fixture)
 
     def __str__(self):
@@ -92,8 +129,9 @@ class TacTestFixtureTestCase(testtools.TestCase):
         # Fire up the fixture, capturing warnings.
         with warnings.catch_warnings(record=True) as warnings_log:
             with fixture:
-                self.assertThat(fixture, IsRunning())
-            self.assertThat(fixture, Not(IsRunning()))
+                running = IsRunning()
+                self.assertThat(fixture, running)
+            self.assertThat(fixture, Not(running))
 
         # No warnings are emitted.
         self.assertEqual([], warnings_log)
@@ -114,22 +152,26 @@ class TacTestFixtureTestCase(testtools.TestCase):
         self.assertRaises(TacException, self.useFixture, fixture)
         self.assertThat(fixture, Not(IsRunning()))
 
+    @skipIf(not hasattr(os, "pidfd_open"), "pidfd not supported")
+    def test_exitingTac(self):
+        """If the daemon dies during startup, TacTestFixture fails right away,
+        without waiting for the startup timeout.
+        """
+        tempdir = self.useFixture(TempDir()).path
+        fixture = SimpleTac("exits", tempdir, 9876)
+
+        error = self.assertRaises(TacException, self.useFixture, fixture)
+        self.assertIn("exited during startup", str(error))
+        self.assertThat(fixture, Not(IsRunning()))
+
     def test_stalePidFile(self):
         """TacTestFixture complains about stale pid files."""
         tempdir = self.useFixture(TempDir()).path
         fixture = SimpleTac("okay", tempdir, 9876)
 
-        # Run a short-lived process with the intention of using its pid in the
-        # next step. Linux uses pids sequentially (from the information I've
-        # been able to discover) so this approach is safe as long as we don't
-        # delay until pids wrap... which should be a very long time unless the
-        # machine is seriously busy.
-        process = subprocess.Popen("true")
-        process.wait()
-
-        # Put the (now bogus) pid in the pid file.
+        # Put a bogus pid in the pid file.
         with open(fixture.pidfile, "w") as pidfile:
-            pidfile.write(str(process.pid))
+            pidfile.write(str(_find_dead_pid()))
 
         # Fire up the fixture, capturing warnings.
         with warnings.catch_warnings(record=True) as warnings_log:
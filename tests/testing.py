@@ -0,0 +1,98 @@
+"""Helpers for the integration tests."""
+
+from fixtures import FakeLogger
+
+from systemfixtures import FakeExecutable
+
+from txfixtures.reactor import Reactor
+
+
+class ReusableExecutable(FakeExecutable):
+    """A `FakeExecutable` whose script can be reset to its initial content."""
+
+    def _setUp(self):
+        super(ReusableExecutable, self)._setUp()
+        with open(self.path) as fd:
+            self._preamble = fd.read()
+
+    def reset(self):
+        """Discard all the lines added to the script since setup."""
+        with open(self.path, "w") as fd:
+            fd.write(self._preamble)
+
+
+class SharedFakeLogger(FakeLogger):
+    """A `FakeLogger` meant to be set up once and shared by several tests.
+
+    Installing and removing the capturing handler for every single test is
+    wasteful, so this fixture is typically set up in ``setUpClass``, and then
+    attached to each test in ``setUp``.
+    """
+
+    def reset(self):
+        """Discard the output captured so far, keeping the handler in place."""
+        self._output.seek(0)
+        self._output.truncate()
+
+    def attach(self, test):
+        """Reset the captured output and expose it as a detail of `test`."""
+        self.reset()
+        for name, content in self.getDetails().items():
+            test.addDetail(name, content)
+
+
+class SharedLoggerMixin(object):
+    """Capture the log of a test case with a single `SharedFakeLogger`.
+
+    The output captured while running each test is attached to it.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(SharedLoggerMixin, cls).setUpClass()
+        cls.logger = SharedFakeLogger()
+        cls.logger.setUp()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.logger.cleanUp()
+        super(SharedLoggerMixin, cls).tearDownClass()
+
+    def setUp(self):
+        super(SharedLoggerMixin, self).setUp()
+        self.logger.attach(self)
+
+
+class SharedReactorMixin(SharedLoggerMixin):
+    """Run all the tests of a test case against a single `Reactor` fixture.
+
+    Starting and stopping the reactor thread is expensive, so it's done just
+    once per test case, and each test only makes sure that the reactor is
+    still running.
+
+    :cvar twistedReactor: The Twisted reactor that the fixture should run, by
+        default a new one.
+    """
+
+    twistedReactor = None
+
+    @classmethod
+    def setUpClass(cls):
+        super(SharedReactorMixin, cls).setUpClass()
+        cls.reactor = Reactor(cls.twistedReactor)
+        try:
+            cls.reactor.setUp()
+        except Exception:
+            # tearDownClass won't be called.
+            cls.logger.cleanUp()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.reactor.cleanUp()
+        super(SharedReactorMixin, cls).tearDownClass()
+
+    def setUp(self):
+        super(SharedReactorMixin, self).setUp()
+        # Recover the reactor if the previous test broke it.
+        self.reactor.reset()
@@ -1,5 +1,3 @@
-from pbr.version import VersionInfo
-
 from .reactor import (
     Reactor,
 )
@@ -10,6 +8,17 @@ __all__ = [
     "Service",
 ]
 
-_v = VersionInfo("txfixtures").semantic_version()
-__version__ = _v.release_string()
-version_info = _v.version_tuple()
+
+def __getattr__(name):
+    # Figuring out the version means having pbr read the package metadata,
+    # so only do it the first time the version is actually looked up, and
+    # then cache it as regular module attributes.
+    if name in ("__version__", "version_info"):
+        from pbr.version import VersionInfo
+        _v = VersionInfo("txfixtures").semantic_version()
+        globals().update(
+            __version__=_v.release_string(),
+            version_info=_v.version_tuple(),
+        )
+        return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -9,7 +9,7 @@ from twisted.python.failure import Failure
 
 from txfixtures._twisted.backports.testing import MemoryReactorClock
 
-EXPECTED_SIGNALS = (signal.SIGTERM, signal.SIGTERM)
+EXPECTED_SIGNALS = frozenset([signal.SIGTERM])
 
 
 class ThreadedMemoryReactorClock(MemoryReactorClock):
@@ -40,13 +40,14 @@ class ThreadedMemoryReactorClock(MemoryReactorClock):
         f(*args, **kwargs)
 
         # Spin the timer until there are no delayed calls left, or until the
-        # limit is reached.
+        # limit is reached. The pending calls are kept sorted by time, so the
+        # first one is always the next to fire.
         limit = 10
-        count = 0
-        while self.getDelayedCalls() and count < limit:
-            call = self.getDelayedCalls()[0]
-            self.advance(call.getTime() - self.seconds())
-            count += 1
+        for _ in range(limit):
+            calls = self.getDelayedCalls()
+            if not calls:
+                break
+            self.advance(calls[0].getTime() - self.seconds())
 
     def addReader(self, reader):
         reader.install = lambda: setattr(reader, "installed", True)
@@ -14,14 +14,12 @@ from txfixtures._twisted.threading import (
     interruptableCallFromThread,
 )
 
-from txfixtures.reactor import Reactor
+from tests.testing import SharedReactorMixin
 
 
-class InterruptableCallFromThreadTest(TestCase):
+class InterruptableCallFromThreadTest(SharedReactorMixin, TestCase):
 
-    def setUp(self):
-        super(InterruptableCallFromThreadTest, self).setUp()
-        self.useFixture(Reactor(reactor))
+    twistedReactor = reactor
 
     def test_success(self):
         """
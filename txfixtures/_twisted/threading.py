@@ -1,9 +1,6 @@
 """Extensions to Twisted's stock threading code."""
 
-from six.moves.queue import (
-    Queue,
-    Empty,
-)
+import threading
 
 from twisted.internet.defer import maybeDeferred
 from twisted.python.failure import Failure
@@ -13,6 +10,20 @@ class CallFromThreadTimeout(Exception):
     """Raised when interruptableCallFromThread times out."""
 
 
+class _Slot(object):
+    """Hold a single value handed over from one thread to another."""
+
+    __slots__ = ("value", "event")
+
+    def __init__(self):
+        self.value = None
+        self.event = threading.Event()
+
+    def put(self, value):
+        self.value = value
+        self.event.set()
+
+
 def interruptableCallFromThread(_reactor, timeout, f, *a, **kw):
     """An interruptable version of Twisted's blockingCallFromThread.
 
@@ -20,16 +31,16 @@ def interruptableCallFromThread(_reactor, timeout, f, *a, **kw):
     a new 'timeout' argument that will make the call fail after the given
     amount of seconds.
     """
-    queue = Queue()
-
-    def _callFromThread(queue, f):
-        result = maybeDeferred(f, *a, **kw)
-        result.addBoth(queue.put)
-    _reactor.callFromThread(_callFromThread, queue, f)
-    try:
-        result = queue.get(timeout=timeout)
-    except Empty:
+    slot = _Slot()
+    _reactor.callFromThread(_callFromThread, slot, f, a, kw)
+    if not slot.event.wait(timeout):
         raise CallFromThreadTimeout()
+    result = slot.value
     if isinstance(result, Failure):
         result.raiseException()
     return result
+
+
+def _callFromThread(slot, f, a, kw):
+    """Run in the reactor thread, putting the outcome of `f` into `slot`."""
+    maybeDeferred(f, *a, **kw).addBoth(slot.put)
@@ -8,11 +8,11 @@
 import errno
 import os
 import os.path
+import select
 from signal import (
     SIGKILL,
     SIGTERM,
     )
-import socket
 import time
 
 
@@ -30,18 +30,21 @@ def _kill_may_race(pid, signal_number):
 
 def get_pid_from_file(pidfile_path):
     """Retrieve the PID from the given file, if it exists, None otherwise."""
-    # Get the pid, ignoring failures due to the pidfile not existing.
+    # Get the pid, ignoring failures due to the pidfile not existing. The
+    # file is tiny, so read it raw and skip the text decoding machinery.
     try:
-        with open(pidfile_path, 'r') as fd:
-            pid = fd.read().split()[0]
-    except IOError:
+        fd = os.open(pidfile_path, os.O_RDONLY)
+    except OSError:
         return None
     try:
-        pid = int(pid)
-    except ValueError:
-        # pidfile contains rubbish
+        data = os.read(fd, 64)
+    finally:
+        os.close(fd)
+    try:
+        return int(data.split(None, 1)[0])
+    except (IndexError, ValueError):
+        # pidfile is empty or contains rubbish
         return None
-    return pid
 
 
 def process_exists(pid):
@@ -58,26 +61,136 @@ def process_exists(pid):
     return True
 
 
+def pidfd_open_or_none(pid):
+    """Return a file descriptor referring to the process with the given pid.
+
+    If process file descriptors are not supported (they require Linux 5.3
+    and Python 3.9), None is returned.
+    """
+    try:
+        return os.pidfd_open(pid)
+    except AttributeError:
+        return None
+    except OSError as e:
+        if e.errno == errno.ENOSYS:
+            return None
+        raise
+
+
+def wait_pidfd(pidfd, timeout):
+    """Wait for the process referred by 'pidfd' to exit.
+
+    :return: True if the process exited within 'timeout' seconds, False
+        otherwise.
+    """
+    poller = select.poll()
+    poller.register(pidfd, select.POLLIN)
+    return bool(poller.poll(timeout * 1000))
+
+
+def _get_exit_status(pid):
+    """Return the exit status of 'pid', if it's an exited child process.
+
+    The child is not reaped, so whoever spawned it can still wait for it.
+
+    :return: Like `subprocess.Popen.returncode`, the exit code of the
+        process, or the negated number of the signal that killed it. None if
+        'pid' is still running or is not a child of the calling process.
+    """
+    try:
+        info = os.waitid(
+            os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+    except (AttributeError, ChildProcessError):
+        return None
+    if info is None:
+        return None
+    if info.si_code == os.CLD_EXITED:
+        return info.si_status
+    # CLD_KILLED or CLD_DUMPED
+    return -info.si_status
+
+
 def two_stage_kill(pid, poll_interval=0.1, num_polls=50):
     """Kill process 'pid' with SIGTERM. If it doesn't die, SIGKILL it.
 
+    Where supported, the kernel notifies us as soon as the process exits,
+    otherwise we poll for it.
+
     :param pid: The pid of the process to kill.
     :param poll_interval: The polling interval used to check if the
         process is still around.
     :param num_polls: The number of polls to do before doing a SIGKILL.
+    :return: If 'pid' is a child of the calling process and it exited upon
+        SIGTERM, its exit status as returned by `_get_exit_status`, None
+        otherwise. None is always returned where process file descriptors
+        aren't supported, since then we just poll for the process to be gone.
     """
-    # Kill the process.
-    _kill_may_race(pid, SIGTERM)
-
-    # Poll until the process has ended.
-    for i in range(num_polls):
-        # If the process isn't gone yet, continue.
-        if not process_exists(pid):
+    try:
+        pidfd = pidfd_open_or_none(pid)
+    except OSError as e:
+        if e.errno == errno.ESRCH:
+            # Process is already gone.
             return
-        time.sleep(poll_interval)
+        raise
+
+    try:
+        # Kill the process.
+        _kill_may_race(pid, SIGTERM)
+
+        if pidfd is not None:
+            # Wait until the process has ended.
+            if wait_pidfd(pidfd, poll_interval * num_polls):
+                return _get_exit_status(pid)
+        else:
+            # Poll until the process has ended.
+            for i in range(num_polls):
+                # If the process isn't gone yet, continue.
+                if not process_exists(pid):
+                    return
+                time.sleep(poll_interval)
+
+        # The process is still around, so terminate it violently.
+        _kill_may_race(pid, SIGKILL)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def kill_and_wait(pid, timeout=1):
+    """Kill process 'pid' with SIGKILL and wait for it to exit.
+
+    The process is not reaped, so if it's a child of the calling process
+    whoever spawned it will still be able to wait for it.
+
+    :param pid: The pid of the process to kill.
+    :param timeout: The maximum amount of seconds to wait for the process.
+    :return: True if the process exited within 'timeout' seconds, False
+        otherwise.
+    """
+    try:
+        pidfd = pidfd_open_or_none(pid)
+    except OSError as e:
+        if e.errno == errno.ESRCH:
+            # Process is already gone.
+            return True
+        raise
 
-    # The process is still around, so terminate it violently.
-    _kill_may_race(pid, SIGKILL)
+    try:
+        _kill_may_race(pid, SIGKILL)
+        if pidfd is not None:
+            return wait_pidfd(pidfd, timeout)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+    deadline = time.time() + timeout
+    # An unreaped child still shows up as existing, so check whether it has
+    # exited first and only fall back to probing non-children.
+    while _get_exit_status(pid) is None and process_exists(pid):
+        if time.time() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
 
 
 def kill_by_pidfile(pidfile_path, poll_interval=0.1, num_polls=50):
@@ -104,9 +217,13 @@ def remove_if_exists(path):
 
 
 def until_no_eintr(retries, function, *args, **kwargs):
-    """Run 'function' until it doesn't raise EINTR errors.
+    """Run 'function', which used to be retried on EINTR errors.
+
+    Since Python 3.5 (PEP 475) system calls interrupted by a signal are
+    transparently retried by the interpreter itself, so 'function' is now
+    simply called once. This is kept for backward compatibility.
 
-    :param retries: The maximum number of times to try running 'function'.
+    :param retries: If zero, 'function' is not run at all.
     :param function: The function to run.
     :param *args: Arguments passed to the function.
     :param **kwargs: Keyword arguments passed to the function.
@@ -114,19 +231,4 @@ def until_no_eintr(retries, function, *args, **kwargs):
     """
     if not retries:
         return
-    for i in range(retries):
-        try:
-            return function(*args, **kwargs)
-        except (IOError, OSError) as e:
-            if e.errno == errno.EINTR:
-                continue
-            raise
-        except socket.error as e:
-            # In Python 2.6 we can use IOError instead.  It also has
-            # reason.errno but we might be using 2.5 here so use the
-            # index hack.
-            if e[0] == errno.EINTR:
-                continue
-            raise
-    else:
-        raise
+    return function(*args, **kwargs)
@@ -3,8 +3,6 @@ import signal
 import logging
 import threading
 
-from six.moves.queue import Queue
-
 from fixtures import Fixture
 
 from twisted.internet._signals import _SIGCHLDWaker
@@ -80,9 +78,16 @@ class Reactor(Fixture):
         self._start()
 
     def _start(self):
-        ready = Queue()  # Will be put None as soon as the reactor starts
+        ready = threading.Event()  # Will be set as soon as the reactor starts
 
-        self.reactor.callWhenRunning(ready.put, None)
+        # Add the SIGCHLD waker as reactor reader. This needs to run in the
+        # reactor thread as it's not thread-safe, so piggyback on the startup
+        # triggers instead of paying for a separate round-trip. The SIGCHLD
+        # waker will react to SIGCHLD signals by writing to a dummy pipe,
+        # which will wake up epoll() calls.
+        self.reactor._childWaker = _SIGCHLDWaker()
+        self.reactor.callWhenRunning(self._addSIGCHLDWaker)
+        self.reactor.callWhenRunning(ready.set)
         self.thread = threading.Thread(
             target=self.reactor.run,
             # Don't let the reactor try to install signal handlers, since they
@@ -100,15 +105,14 @@ class Reactor(Fixture):
         self.thread.start()
 
         # Wait for the reactor to actually start and double check it's spinning
-        ready.get(timeout=self.timeout)
+        if not ready.wait(timeout=self.timeout):
+            raise CallFromThreadTimeout("Could not start the reactor")
         assert self.reactor.running, "Could not start the reactor"
 
-        # Add the SIGCHLD waker as reactor reader. This needs to run in the
-        # reactor thread as it's not thread-safe. The SIGCHLD waker will
-        # react to SIGCHLD signals by writing to a dummy pipe, which will
-        # wake up epoll() calls.
-        self.reactor._childWaker = _SIGCHLDWaker()
-        self.call(1, self._addSIGCHLDWaker)
+        # Errors in startup triggers only get logged by the reactor, so make
+        # sure that the SIGCHLD waker was actually added.
+        if self.reactor._childWaker not in self.reactor._internalReaders:
+            raise RuntimeError("Could not add the SIGCHLD waker")
 
         # Install the actual signal hander (this needs to happen in the main
         # thread).
@@ -200,6 +204,7 @@ class Reactor(Fixture):
         #     reactor properly wait for the shutdown sequence. It's probably
         #     a race between this thread and the reactor thread. Needs
         #     investigation.
-        spin = Queue()
-        self.reactor.callFromThread(self.reactor.callLater, 0, spin.put, None)
-        spin.get(timeout=self.timeout)
+        spin = threading.Event()
+        self.reactor.callFromThread(self.reactor.callLater, 0, spin.set)
+        if not spin.wait(timeout=self.timeout):
+            raise CallFromThreadTimeout()
@@ -3,11 +3,12 @@ import os
 import re
 import signal
 import socket
+import time
 
-from datetime import datetime
-from functools import partial
-
-from psutil import Process
+from functools import (
+    lru_cache,
+    partial,
+)
 
 from fixtures import (
     Fixture,
@@ -23,19 +24,27 @@ from twisted.internet.defer import (
     Deferred,
     inlineCallbacks,
 )
-from twisted.internet.task import LoopingCall
 from twisted.internet.endpoints import TCP4ClientEndpoint
 from twisted.internet.error import (
-    ConnectionRefusedError,
+    ConnectError,
     ConnectingCancelledError,
 )
 from twisted.protocols.basic import LineOnlyReceiver
+from twisted.python.failure import Failure
 
 from txfixtures._twisted.backports.defer import addTimeout
+from txfixtures.osutils import kill_and_wait
 
 
 TIMEOUT = 15
 
+# The match groups needed to figure the creation time of a log record, in
+# the order expected by time.mktime().
+_DATE_GROUPS = ("Y", "m", "d", "H", "M", "S")
+
+# The default substitution for the message group, matching the whole line.
+_DEFAULT_MESSAGE = "(?P<message>.+)"
+
 
 class Service(Fixture):
     """Spawn, control and monitor a background service."""
@@ -48,8 +57,10 @@ class Service(Fixture):
         self.args = args or []
 
         if env is None:
-            env = os.environ
-        self.env = _encodeDictValues(env)
+            # The bytes version of the environment is already what we need.
+            self.env = dict(os.environb)
+        else:
+            self.env = _encodeDictValues(env)
 
         self._reactor = reactor.reactor
         self._eventTriggerID = None
@@ -104,14 +115,16 @@ class Service(Fixture):
         try:
             self._callFromThread(self._terminateProcess)
         except:
-            if self.protocol.transport.pid:
+            pid = self.protocol.transport.pid
+            if pid:
                 # In case something goes wrong let's try our best to not leave
-                # running processes around.
+                # running processes around. The process is not reaped here,
+                # since that's up to the reactor.
                 logging.info(
                     "Service process didn't terminate, trying to kill it")
-                process = Process(self.protocol.transport.pid)
-                process.kill()
-                process.wait(timeout=1)
+                if not kill_and_wait(pid, timeout=1):
+                    raise RuntimeError(
+                        "Could not kill service process %d" % pid)
 
     def _callFromThread(self, f):
         # Set an additional timeout for the callFromThread call itself. We
@@ -149,6 +162,15 @@ class ServiceProtocol(ProcessProtocol):
     #: service process executable not being in PATH or not being executable.
     minUptime = 0.2
 
+    #: Interval in seconds between the first two attempts to connect to the
+    #: expected port. The interval doubles after each failed attempt, up to
+    #: `maxProbePortInterval`, so a service that opens its port quickly is
+    #: detected early, without hammering one that takes longer.
+    probePortInterval = 0.005
+
+    #: The maximum interval in seconds between two port probe attempts.
+    maxProbePortInterval = 0.1
+
     def __init__(self, reactor, parser=None, timeout=TIMEOUT):
         self.reactor = reactor
         self.parser = parser or ServiceOutputParser()
@@ -186,15 +208,26 @@ class ServiceProtocol(ProcessProtocol):
         # output (if any).
         self._expectedOutputReady = Deferred()
 
-        # A LoopingCall instance that will periodically try to open the port
-        # that the process is supposed to start listening to.
+        # Deferred that will be fired when the port probe loop stops, either
+        # because the expected port was opened or because we stopped waiting.
         self._probePortLoop = None
 
+        # Delayed call for the next attempt to open the port that the process
+        # is supposed to start listening to, and the interval that will be
+        # used for scheduling the attempt after that.
+        self._probePortCall = None
+        self._probePortNextInterval = None
+
         # A connector as returned by TCP4ClientEndpoint.connect() that can be
         # used to abort an ongoing connection attempt as performed by the
         # port probe loop.
         self._probePortAttempt = None
 
+        # The factory for the connections opened by port probes. We don't
+        # care about them other than for the fact that they succeed, so a
+        # single do-nothing factory is used by all attempts.
+        self._probePortFactory = Factory.forProtocol(Protocol)
+
     def connectionMade(self):
         # Called (indirectly) by `spawnProcess` after the `os.fork` call has
         # succeeded.
@@ -276,20 +309,35 @@ class ServiceProtocol(ProcessProtocol):
         logging.info("Service process emitted '%s'", text)
         self._expectedOutputReady.callback(None)
 
-    @inlineCallbacks
     def _startProbePortLoop(self, _):
         """
         Called when the service process has stayed up for at least `minUptime`
         seconds and it has emitted the expected output string (or there was no
         expected output string at all).
-        """
-
-        self._probePortLoop = LoopingCall(self._probePort)
-        self._probePortLoop.clock = self.reactor
 
-        # The LoopingCall.start() method returns a deferred that will fire
-        # when the loop stops, i.e. when we successfully probe the port.
-        yield self._probePortLoop.start(0.1)
+        :return: A deferred that will fire when the loop stops, i.e. when we
+            successfully probe the port.
+        """
+        self._probePortLoop = Deferred()
+        self._probePortNextInterval = self.probePortInterval
+        self._probePort()
+        return self._probePortLoop
+
+    def _scheduleProbePort(self):
+        """Schedule the next port probe attempt, backing off exponentially."""
+        interval = self._probePortNextInterval
+        self._probePortNextInterval = min(
+            interval * 2, self.maxProbePortInterval)
+        self._probePortCall = self.reactor.callLater(
+            interval, self._probePort)
+
+    def _stopProbePortLoop(self):
+        """Stop the port probe loop, firing the deferred tracking it."""
+        if self._probePortCall and self._probePortCall.active():
+            self._probePortCall.cancel()
+        self._probePortCall = None
+        if not self._probePortLoop.called:
+            self._probePortLoop.callback(None)
 
     @inlineCallbacks
     def _probePort(self):
@@ -297,29 +345,34 @@ class ServiceProtocol(ProcessProtocol):
 
         If the probe succeeds the probe loop will be stoped.
 
-        If the probe fails with a connection error, we'll just return
-        gracefully (we'll be invoked again at the next loop iteration).
+        If the probe fails with a connection error, we'll schedule another
+        attempt, a bit later than the previous one. Any other error makes us
+        give up waiting, failing the 'ready' deferred with it.
         """
         logging.info("Polling service port '%s'", self.expectedPort)
 
+        # Use the numeric loopback address, so no name resolution is needed
+        # for each attempt.
         endpoint = TCP4ClientEndpoint(
-            self.reactor, "localhost", self.expectedPort)
+            self.reactor, "127.0.0.1", self.expectedPort)
 
         try:
-            factory = Factory()
-            factory.protocol = Protocol
-            self._probePortAttempt = endpoint.connect(factory)
+            self._probePortAttempt = endpoint.connect(self._probePortFactory)
             yield self._probePortAttempt
-        except ConnectionRefusedError as error:
+        except ConnectError as error:
             logging.info("Service port probe failed: %s", error)
+            if not self._probePortLoop.called:
+                self._scheduleProbePort()
         except ConnectingCancelledError as error:
             # This happens if _stopWaitingForReady gets called while we are
             # waiting for the enpoint connect() to succeed or fail.
             logging.info("Service port probe cancelled: %s", error)
+        except Exception:
+            self._stopWaitingForReady(Failure())
         else:
-            if self._probePortLoop.running:
-                self._probePortLoop.stop()
+            if not self._probePortLoop.called:
                 logging.info("Service opened port %d", self.expectedPort)
+                self._stopProbePortLoop()
         finally:
             self._probePortAttempt = None
 
@@ -364,7 +417,7 @@ class ServiceProtocol(ProcessProtocol):
             if self._probePortAttempt:
                 self._probePortAttempt.cancel()
 
-            self._probePortLoop.stop()
+            self._stopProbePortLoop()
             message = "expected port not yet open"
 
         # We can safely assume that one of the conditions above is holding,
@@ -415,7 +468,7 @@ class ServiceOutputParser(LineOnlyReceiver):
         "msecs": "(?P<msecs>\d{3})",
         "levelname": "(?P<levelname>[a-zA-Z]+)",
         "name": "(?P<name>.+)",
-        "message": "(?P<message>.+)",
+        "message": _DEFAULT_MESSAGE,
     }
 
     #: A string identifying the service whose output is being
@@ -427,6 +480,23 @@ class ServiceOutputParser(LineOnlyReceiver):
         self.pattern = pattern or "{message}"
         self.logger = logger or logging.getLogger("")
         self._callbacks = {}
+        self._callbacksRegex = None
+
+    @property
+    def pattern(self):
+        """The pattern that each received line is matched against.
+
+        The resulting regex is compiled when the next line is received, so
+        lines can be matched without expanding the substitutions every single
+        time.
+        """
+        return self._pattern
+
+    @pattern.setter
+    def pattern(self, pattern):
+        self._pattern = pattern
+        self._regex = None
+        self._regexSubstitutions = None
 
     def setServiceName(self, name):
         self.service = name
@@ -437,6 +507,7 @@ class ServiceOutputParser(LineOnlyReceiver):
         The callback will be fired only once when and if a match is found.
         """
         self._callbacks[text] = callback
+        self._compileCallbacksRegex()
 
     def lineReceived(self, line):
         """Foward the received line to the Python logging system."""
@@ -448,21 +519,52 @@ class ServiceOutputParser(LineOnlyReceiver):
             "processName": self.service,
         }
 
-        match = re.match(self.pattern.format(**self.substitutions), message)
-        if match:
-            params.update(self._getLogRecordParamsForMatch(match))
+        regex = self._getRegex()
+        if regex is not None:
+            match = regex.match(message)
+            if match:
+                params.update(self._getLogRecordParamsForMatch(match))
 
         record = logging.makeLogRecord(params)
         self.logger.handle(record)
 
-        for text in list(self._callbacks.keys()):
-            if text in record.msg:
+        # Scan the line only once to figure if any callback needs to be
+        # fired, and don't scan it at all if there are no callbacks left.
+        if self._callbacks and self._callbacksRegex.search(record.msg):
+            matched = [text for text in self._callbacks if text in record.msg]
+            for text in matched:
                 self._callbacks.pop(text)()
+            self._compileCallbacksRegex()
 
     def lineLengthExceeded(self, line):
         """Simply truncate the line."""
         self.lineReceived(line[:self.MAX_LENGTH])
 
+    def _getRegex(self):
+        """Return the regex to match lines against, or None to skip matching.
+
+        The regex is compiled again if `substitutions` was replaced since the
+        last time, for instance by a subclass after __init__.
+        """
+        substitutions = self.substitutions
+        if substitutions is not self._regexSubstitutions:
+            self._regexSubstitutions = substitutions
+            if (self._pattern == "{message}" and
+                    substitutions.get("message") == _DEFAULT_MESSAGE):
+                # Matching the whole line as message is what happens anyway
+                # for lines not matching the pattern, so skip the regex
+                # altogether.
+                self._regex = None
+            else:
+                self._regex = _compilePattern(
+                    self._pattern, tuple(sorted(substitutions.items())))
+        return self._regex
+
+    def _compileCallbacksRegex(self):
+        """Build a regex matching any of the texts we have callbacks for."""
+        self._callbacksRegex = re.compile(
+            "|".join(re.escape(text) for text in self._callbacks))
+
     def _getLogRecordParamsForMatch(self, match):
         """
         Use the given `match` regex object to create a dict of parameters
@@ -471,49 +573,53 @@ class ServiceOutputParser(LineOnlyReceiver):
         This method will try to use all the information extracted by the
         match. If some of it is missing or incomplete, it will be discarded.
         """
-        groups = _filterNoneValues(match.groupdict())
+        # Groups that are missing from the pattern or that didn't participate
+        # in the match are both None here.
+        groups = match.groupdict()
         params = {
             "name": groups.get("name"),
             "msg": groups.get("message"),
         }
 
-        if "levelname" in groups:
-            levelname = groups["levelname"].upper()
+        levelname = groups.get("levelname")
+        if levelname is not None:
+            levelname = levelname.upper()
             params["levelname"] = levelname
-            params["levelno"] = logging.getLevelName(params["levelname"])
-
-        # Only set creation time if all date-related groups are there.
-        if set(groups.keys()).issuperset({"Y", "m", "d", "H", "M", "S"}):
-            params["created"] = float(datetime(
-                int(groups["Y"]),
-                int(groups["m"]),
-                int(groups["d"]),
-                int(groups["H"]),
-                int(groups["M"]),
-                int(groups["S"]),
-            ).strftime("%s"))
-
-        if "msecs" in groups:
-            params["msecs"] = float(groups["msecs"])
+            params["levelno"] = logging.getLevelName(levelname)
+
+        # Only set creation time if all date-related groups are there. The
+        # date is in local time, so let mktime() figure the DST flag.
+        date = [groups.get(name) for name in _DATE_GROUPS]
+        if None not in date:
+            params["created"] = time.mktime(
+                tuple(int(value) for value in date) + (0, 0, -1))
+
+        msecs = groups.get("msecs")
+        if msecs is not None:
+            params["msecs"] = float(msecs)
 
         return params
 
 
-def _filterNoneValues(d):
+@lru_cache(maxsize=32)
+def _compilePattern(pattern, substitutions):
     """
-    Return a dict which is the same as `d`, except for keys with None values,
-    which get discarded.
+    Return the compiled regex for the given line `pattern`, expanded with the
+    given `substitutions` (a tuple of name/snippet pairs).
+
+    Parsers using the same pattern, like all instances of a given service
+    fixture, share the same compiled regex.
     """
-    return dict([(k, v) for k, v in d.items() if v is not None])
+    return re.compile(pattern.format(**dict(substitutions)))
 
 
 def _encodeDictValues(d):
     """
     Return a dict whose unicode values get UTF-8 encoded to bytes.
     """
-    return dict(
-        [(_maybeEncode(k), _maybeEncode(v))
-         for k, v in d.items() if v is not None])
+    return {
+        _maybeEncode(k): _maybeEncode(v)
+        for k, v in d.items() if v is not None}
 
 
 def _maybeEncode(x):
@@ -25,8 +25,9 @@ from testtools.content import content_from_file
 from txfixtures.osutils import (
     get_pid_from_file,
     kill_by_pidfile,
+    pidfd_open_or_none,
     two_stage_kill,
-    until_no_eintr,
+    wait_pidfd,
     )
 
 
@@ -54,12 +55,12 @@ class TacTestFixture(Fixture):
             system default.  Must be provided if python_path is given.
         """
         super(TacTestFixture, self).setUp()
-        if get_pid_from_file(self.pidfile):
+        pid = get_pid_from_file(self.pidfile)
+        if pid:
             # An attempt to run while there was an existing live helper
             # was made. Note that this races with helpers which use unique
             # roots, so when moving/eliminating this code check subclasses
             # for workarounds and remove those too.
-            pid = get_pid_from_file(self.pidfile)
             warnings.warn("Attempt to start Tachandler %r with an existing "
                 "instance (%d) running in %s." % (
                 self.tacfile, pid, self.pidfile),
@@ -107,11 +108,16 @@ class TacTestFixture(Fixture):
             )
         self.addCleanup(self.killTac)
         try:
-            stdout = until_no_eintr(10, self._proc.stdout.read)
+            try:
+                stdout, _ = self._proc.communicate(timeout=20)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+                raise TacException('Timeout running %s' % (args,))
             if stdout:
                 raise TacException('Error running %s: unclean stdout/err: %s'
                                    % (args, stdout))
-            rv = self._proc.wait()
+            rv = self._proc.returncode
             # twistd will normally fork off into the background with the
             # originally-spawned process exiting 0.
             if rv != 0:
@@ -135,17 +141,20 @@ class TacTestFixture(Fixture):
         want to check the port is up rather than for the contents of the log
         file.
         """
+        s = socket.socket()
         try:
-            s = socket.socket()
             s.settimeout(2.0)
-            s.connect((host, port))
+            # Use connect_ex(), since a refused connection is the expected
+            # outcome until the daemon is up, and there's no point in raising
+            # and catching an exception for it every time.
+            error = s.connect_ex((host, port))
+        finally:
             s.close()
+        if error == 0:
             return True
-        except socket.error as e:
-            if e.errno == errno.ECONNREFUSED:
-                return False
-            else:
-                raise
+        if error == errno.ECONNREFUSED:
+            return False
+        raise socket.error(error, os.strerror(error))
 
     def _waitForDaemonStartup(self):
         """ Wait for the daemon to fully start.
@@ -157,15 +166,57 @@ class TacTestFixture(Fixture):
         """
         # Watch the log file for readyservice.LOG_MAGIC to signal that startup
         # has completed.
+        # Start polling quickly, backing off up to 0.1 seconds between checks
+        # for daemons that take longer.
         now = time.time()
         deadline = now + 20
-        while now < deadline and not self._hasDaemonStarted():
-            time.sleep(0.1)
-            now = time.time()
+        interval = 0.005
+        pidfd = None
+        # Whether to keep looking for the daemon's pid, to wait on it.
+        watchDaemon = True
+        try:
+            while now < deadline and not self._hasDaemonStarted():
+                if watchDaemon and pidfd is None:
+                    pid = get_pid_from_file(self.pidfile)
+                    if pid is not None:
+                        pidfd = self._openDaemonPidfd(pid)
+                        # Without process file descriptors support there's
+                        # no point in reading the pid file again.
+                        watchDaemon = pidfd is not None
+                if pidfd is None:
+                    time.sleep(interval)
+                elif wait_pidfd(pidfd, interval):
+                    # Rather than sleeping, we wait for the daemon to exit,
+                    # so if it dies we can bail out right away.
+                    self._raiseDaemonExited()
+                interval = min(interval * 2, 0.1)
+                now = time.time()
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
 
         if now >= deadline:
             raise TacException('Unable to start %s.' % self.tacfile)
 
+    def _openDaemonPidfd(self, pid):
+        """Return a pidfd for the daemon process 'pid'.
+
+        :return: A file descriptor, or None if process file descriptors
+            aren't supported.
+        :raises TacException: If the daemon already exited.
+        """
+        try:
+            return pidfd_open_or_none(pid)
+        except OSError as e:
+            if e.errno == errno.ESRCH:
+                self._raiseDaemonExited()
+            raise
+
+    def _raiseDaemonExited(self):
+        """Raise a TacException reporting that the daemon exited early."""
+        raise TacException(
+            'Daemon for %s exited during startup.' % self.tacfile)
+
     def tearDown(self):
         # For compatibility - migrate to cleanUp.
         self.cleanUp()
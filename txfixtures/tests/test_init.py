@@ -0,0 +1,20 @@
+from testtools import TestCase
+
+import txfixtures
+
+
+class VersionTest(TestCase):
+
+    def test_version(self):
+        """
+        The package version is computed upon first access, and then cached as
+        regular module attributes.
+        """
+        self.assertIsInstance(txfixtures.__version__, str)
+        self.assertIsInstance(txfixtures.version_info, tuple)
+        self.assertIn("__version__", vars(txfixtures))
+        self.assertIn("version_info", vars(txfixtures))
+
+    def test_unknown_attribute(self):
+        """Looking up an unknown attribute still fails as usual."""
+        self.assertRaises(AttributeError, getattr, txfixtures, "foo")
@@ -4,16 +4,73 @@
 import errno
 import os
 import signal
+import subprocess
 
-from fixtures import MockPatch
+from unittest import skipIf
+
+from fixtures import (
+    Fixture,
+    MockPatch,
+    TempDir,
+    )
 from testtools import TestCase
 
 from txfixtures.osutils import (
+    _get_exit_status,
+    get_pid_from_file,
+    kill_and_wait,
     process_exists,
     two_stage_kill,
     )
 
 
+class FakePidfd(Fixture):
+    """Make `os.pidfd_open` return a pipe standing in for a process fd.
+
+    :ivar fd: The fake pidfd. It's readable, like the pidfd of a process
+        that exited, only if 'exited' is True.
+    """
+
+    def __init__(self, exited=False):
+        super(FakePidfd, self).__init__()
+        self.exited = exited
+
+    def _setUp(self):
+        # The code under test is expected to close the read end.
+        self.fd, write_fd = os.pipe()
+        self.addCleanup(os.close, write_fd)
+        if self.exited:
+            os.write(write_fd, b'x')
+        self.useFixture(
+            MockPatch('os.pidfd_open', create=True, return_value=self.fd))
+
+
+class TestGetPidFromFile(TestCase):
+
+    def setUp(self):
+        super(TestGetPidFromFile, self).setUp()
+        self.path = self.useFixture(TempDir()).join("test.pid")
+
+    def _write(self, data):
+        with open(self.path, "wb") as fd:
+            fd.write(data)
+
+    def test_pid(self):
+        self._write(b"123\n")
+        self.assertEqual(123, get_pid_from_file(self.path))
+
+    def test_missing(self):
+        self.assertIsNone(get_pid_from_file(self.path))
+
+    def test_empty(self):
+        self._write(b"")
+        self.assertIsNone(get_pid_from_file(self.path))
+
+    def test_rubbish(self):
+        self._write(b"foo bar\n")
+        self.assertIsNone(get_pid_from_file(self.path))
+
+
 class TestProcessExists(TestCase):
 
     def test_with_process_running(self):
@@ -33,8 +90,48 @@ class TestProcessExists(TestCase):
         self.assertRaises(OSError, process_exists, 123)
 
 
+class TestGetExitStatus(TestCase):
+
+    def _spawnAndWaitExit(self, args):
+        """Spawn a child and wait for it to exit, without reaping it."""
+        process = subprocess.Popen(args)
+        self.addCleanup(process.wait)
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        return process
+
+    def test_exited(self):
+        process = self._spawnAndWaitExit(['sh', '-c', 'exit 15'])
+        self.assertEqual(15, _get_exit_status(process.pid))
+        self.assertEqual(15, process.wait())
+
+    def test_exited_cleanly(self):
+        process = self._spawnAndWaitExit(['true'])
+        self.assertEqual(0, _get_exit_status(process.pid))
+
+    def test_killed(self):
+        process = self._spawnAndWaitExit(['sh', '-c', 'kill -TERM $$'])
+        self.assertEqual(-signal.SIGTERM, _get_exit_status(process.pid))
+        self.assertEqual(-signal.SIGTERM, process.wait())
+
+    def test_running(self):
+        process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        self.assertIsNone(_get_exit_status(process.pid))
+
+    def test_not_child(self):
+        self.assertIsNone(_get_exit_status(1))
+
+
 class TestTwoStageKill(TestCase):
 
+    def setUp(self):
+        super(TestTwoStageKill, self).setUp()
+        # Exercise the polling code path, used when pidfds are not supported.
+        self.useFixture(MockPatch(
+            'os.pidfd_open', create=True,
+            side_effect=OSError(errno.ENOSYS, os.strerror(errno.ENOSYS))))
+
     def test_already_dead(self):
         exception = OSError()
         exception.errno = errno.ESRCH
@@ -89,3 +186,101 @@ class TestTwoStageKill(TestCase):
             [((123, signal.SIGKILL), {})])
         self.assertEqual(50, sleep.call_count)
         sleep.assert_has_calls([((0.1,), {})] * 50)
+
+
+class TestTwoStageKillWithPidfd(TestCase):
+
+    def test_already_dead(self):
+        exception = OSError()
+        exception.errno = errno.ESRCH
+        self.useFixture(
+            MockPatch('os.pidfd_open', create=True, side_effect=exception))
+        kill = self.useFixture(MockPatch('os.kill')).mock
+        self.assertIsNone(two_stage_kill(123))
+        kill.assert_not_called()
+
+    @skipIf(not hasattr(os, 'pidfd_open'), 'pidfd not supported')
+    def test_dies(self):
+        process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(process.wait)
+        sleep = self.useFixture(MockPatch('time.sleep')).mock
+        self.assertEqual(-signal.SIGTERM, two_stage_kill(process.pid))
+        # The process was not reaped.
+        self.assertEqual(-signal.SIGTERM, process.wait(timeout=5))
+        sleep.assert_not_called()
+
+    def test_dies_not_child(self):
+        self.useFixture(FakePidfd(exited=True))
+        kill = self.useFixture(MockPatch('os.kill')).mock
+        waitid = self.useFixture(
+            MockPatch('os.waitid', side_effect=ChildProcessError())).mock
+        self.assertIsNone(two_stage_kill(123))
+        kill.assert_called_once_with(123, signal.SIGTERM)
+        self.assertEqual(1, waitid.call_count)
+
+    def test_requires_sigkill(self):
+        pidfd = self.useFixture(FakePidfd()).fd
+        kill = self.useFixture(MockPatch('os.kill')).mock
+        two_stage_kill(123, poll_interval=0.01, num_polls=1)
+        kill.assert_has_calls(
+            [((123, signal.SIGTERM), {}), ((123, signal.SIGKILL), {})])
+        # The pidfd got closed.
+        self.assertRaises(OSError, os.fstat, pidfd)
+
+    def test_kill_fails(self):
+        pidfd = self.useFixture(FakePidfd()).fd
+        exception = OSError()
+        exception.errno = errno.EPERM
+        self.useFixture(MockPatch('os.kill', side_effect=exception))
+        self.assertRaises(OSError, two_stage_kill, 123)
+        # The pidfd got closed.
+        self.assertRaises(OSError, os.fstat, pidfd)
+
+
+class TestKillAndWait(TestCase):
+
+    def test_already_dead(self):
+        exception = OSError()
+        exception.errno = errno.ESRCH
+        self.useFixture(
+            MockPatch('os.pidfd_open', create=True, side_effect=exception))
+        kill = self.useFixture(MockPatch('os.kill')).mock
+        self.assertTrue(kill_and_wait(123))
+        kill.assert_not_called()
+
+    @skipIf(not hasattr(os, 'pidfd_open'), 'pidfd not supported')
+    def test_dies(self):
+        process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(process.wait)
+        self.assertTrue(kill_and_wait(process.pid))
+        # The process was not reaped.
+        self.assertEqual(-signal.SIGKILL, process.wait())
+
+    def test_dies_without_pidfd(self):
+        exception = OSError()
+        exception.errno = errno.ENOSYS
+        self.useFixture(
+            MockPatch('os.pidfd_open', create=True, side_effect=exception))
+        process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(process.wait)
+        # The child is a zombie until reaped, but it's still detected as gone.
+        self.assertTrue(kill_and_wait(process.pid))
+        self.assertEqual(-signal.SIGKILL, process.wait())
+
+    def test_kill_fails(self):
+        pidfd = self.useFixture(FakePidfd()).fd
+        exception = OSError()
+        exception.errno = errno.EPERM
+        self.useFixture(MockPatch('os.kill', side_effect=exception))
+        self.assertRaises(OSError, kill_and_wait, 123)
+        # The pidfd got closed.
+        self.assertRaises(OSError, os.fstat, pidfd)
+
+    def test_timeout(self):
+        exception = OSError()
+        exception.errno = errno.ENOSYS
+        self.useFixture(
+            MockPatch('os.pidfd_open', create=True, side_effect=exception))
+        kill = self.useFixture(MockPatch('os.kill')).mock
+        self.assertFalse(kill_and_wait(123, timeout=0.05))
+        self.assertEqual(((123, signal.SIGKILL), {}), kill.call_args_list[0])
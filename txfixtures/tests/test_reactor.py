@@ -1,6 +1,9 @@
 from testtools import TestCase
 
-from fixtures import FakeLogger
+from fixtures import (
+    FakeLogger,
+    MultipleExceptions,
+)
 
 from systemfixtures import FakeThreads
 
@@ -8,6 +11,7 @@ from twisted.internet.defer import succeed
 from twisted.internet._signals import _SIGCHLDWaker
 
 from txfixtures._twisted.testing import ThreadedMemoryReactorClock
+from txfixtures._twisted.threading import CallFromThreadTimeout
 
 from txfixtures.reactor import Reactor
 
@@ -30,6 +34,27 @@ class ReactorTest(TestCase):
         self.assertIsInstance(reader, _SIGCHLDWaker)
         self.assertTrue(reader.installed)
 
+    def test_start_timeout(self):
+        """
+        If the reactor doesn't start within the given timeout, an error is
+        raised.
+        """
+        self.reactor.run = lambda installSignalHandlers=False: None
+        error = self.assertRaises(MultipleExceptions, self.fixture.setUp)
+        self.assertIs(error.args[0][0], CallFromThreadTimeout)
+        self.assertEqual("Could not start the reactor", str(error.args[0][1]))
+
+    def test_sigchld_waker_not_added(self):
+        """
+        If adding the SIGCHLD waker fails at startup, an error is raised.
+        """
+        # The reactor just logs failures of its startup triggers.
+        self.fixture._addSIGCHLDWaker = lambda: None
+        error = self.assertRaises(MultipleExceptions, self.fixture.setUp)
+        self.assertIs(error.args[0][0], RuntimeError)
+        self.assertEqual(
+            "Could not add the SIGCHLD waker", str(error.args[0][1]))
+
     def test_call(self):
         """The call() method is a convenience around blockingFromThread."""
         output = self.fixture.call(0, lambda: succeed("hello"))
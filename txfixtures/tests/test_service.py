@@ -1,4 +1,6 @@
 import logging
+import os
+import time
 
 from datetime import datetime
 
@@ -17,8 +19,10 @@ from testtools.twistedsupport import (
 )
 
 from fixtures import (
+    EnvironmentVariable,
     FakeLogger,
     LogHandler,
+    MockPatch,
     MultipleExceptions,
 )
 
@@ -26,6 +30,7 @@ from twisted.python.failure import Failure
 from twisted.internet.error import (
     ProcessTerminated,
     ConnectionRefusedError,
+    NoRouteError,
 )
 from twisted.internet.defer import (
     Deferred,
@@ -47,6 +52,7 @@ from txfixtures.service import (
     Service,
     ServiceProtocol,
     ServiceOutputParser,
+    _compilePattern,
 )
 
 
@@ -58,6 +64,16 @@ class ServiceTest(TestCase):
         self.reactor = ThreadedMemoryReactorClock()
         self.fixture = Service(Reactor(self.reactor), "foo")
 
+    def test_env(self):
+        """
+        The service process inherits the environment of the test process by
+        default, otherwise the given environment is UTF-8 encoded.
+        """
+        self.assertEqual(dict(os.environb), self.fixture.env)
+        fixture = Service(
+            Reactor(self.reactor), "foo", env={"FOO": "\xe8", "BAR": None})
+        self.assertEqual({b"FOO": b"\xc3\xa8"}, fixture.env)
+
     def test_setup_start_process(self):
         """
         The fixture spawns the given process at setup time, the waits for it
@@ -97,6 +113,22 @@ class ServiceTest(TestCase):
         self.fixture.cleanUp()
         self.assertIn("Service process reaped", self.logger.output)
 
+    def test_cleanup_kill_process(self):
+        """
+        If the process doesn't terminate gracefully at cleanup time, it gets
+        killed, and an error is raised if even that fails.
+        """
+        self.fixture.setUp()
+        self.fixture._terminateProcess = lambda: 1 / 0
+        kill = self.useFixture(MockPatch(
+            "txfixtures.service.kill_and_wait", return_value=False)).mock
+        error = self.assertRaises(RuntimeError, self.fixture.cleanUp)
+        self.assertEqual("Could not kill service process 123", str(error))
+        kill.assert_called_once_with(123, timeout=1)
+        self.assertIn(
+            "Service process didn't terminate, trying to kill it",
+            self.logger.output)
+
     def test_set_output_format(self):
         """
         It's possible to specify an output format to, that will be used to
@@ -232,6 +264,61 @@ class ServiceProtocolTest(TestCase):
         self.assertThat(self.protocol.ready, succeeded(Is(None)))
         self.assertIn("Service opened port 1234", self.logger.output)
 
+    def test_expected_port_probe_connect_error(self):
+        """
+        If probing for the expected port fails with any connection error, the
+        probe will be retried.
+        """
+        self.protocol.expectedPort = 1234
+        self.protocol.makeConnection(self.process)
+        self.reactor.advance(self.protocol.minUptime)
+
+        factory = self.reactor.tcpClients[0][2]
+        factory.clientConnectionFailed(None, NoRouteError())
+        self.assertIn("Service port probe failed", self.logger.output)
+
+        self.reactor.advance(0.1)
+        factory = self.reactor.tcpClients[1][2]
+        factory.buildProtocol(None).connectionMade()
+        self.assertThat(self.protocol.ready, succeeded(Is(None)))
+
+    def test_expected_port_probe_error(self):
+        """
+        If probing for the expected port fails unexpectedly, the 'ready'
+        deferred errbacks with that error.
+        """
+        self.protocol.expectedPort = 1234
+        self.protocol.makeConnection(self.process)
+        self.reactor.advance(self.protocol.minUptime)
+
+        error = RuntimeError("boom")
+        factory = self.reactor.tcpClients[0][2]
+        factory.clientConnectionFailed(None, Failure(error))
+        self.assertThat(
+            self.protocol.ready, failed(MatchesStructure(value=Is(error))))
+        self.assertIn(
+            "Give up waiting for the service to be ready: expected port not "
+            "yet open", self.logger.output)
+
+    def test_expected_port_probe_backoff(self):
+        """
+        The interval between port probe attempts doubles after each failure,
+        up to a maximum.
+        """
+        self.protocol.expectedPort = 1234
+        self.protocol.maxProbePortInterval = 0.01
+        self.protocol.makeConnection(self.process)
+        self.reactor.advance(self.protocol.minUptime)
+
+        for interval in (0.005, 0.01, 0.01):
+            attempts = len(self.reactor.tcpClients)
+            factory = self.reactor.tcpClients[-1][2]
+            factory.clientConnectionFailed(None, ConnectionRefusedError())
+            self.reactor.advance(interval - 0.001)
+            self.assertEqual(attempts, len(self.reactor.tcpClients))
+            self.reactor.advance(0.001)
+            self.assertEqual(attempts + 1, len(self.reactor.tcpClients))
+
     def test_process_dies_shortly_after_fork(self):
         """
         If the service process exists right after having been spawned (for
@@ -386,6 +473,20 @@ class ServiceOutputParserTest(TestCase):
         self.assertEqual(400, record.msecs)
         self.assertEqual("my-app", record.processName)
 
+    def test_match_created(self):
+        """
+        The creation time of the log record is the one of the matched line,
+        interpreted as local time.
+        """
+        # Pin the local timezone to UTC+1, restoring it when done.
+        self.addCleanup(time.tzset)
+        self.useFixture(EnvironmentVariable("TZ", "CET-1"))
+        time.tzset()
+        self.parser.pattern = "{Y}-{m}-{d} {H}:{M}:{S} {message}"
+        self.parser.dataReceived(b"2016-11-14 08:59:41 hi\n")
+        [record] = self.handler.buffer
+        self.assertEqual(1479110381, record.created)
+
     def test_partial_match(self):
         """
         If a line only partially matches the given pattern, missing record
@@ -405,17 +506,74 @@ class ServiceOutputParserTest(TestCase):
 
     def test_no_match(self):
         """
-        If a line doesn't match the given pattern, a log record is created
-        with a message that equals the whole line.
-        """
-        self.parser.pattern = "{Y}-{m}-{d} {H}:{M}:{S} {message}"
-        self.parser.dataReceived(b"hello world!\n")
+        If a line doesn't match the given pattern, or the pattern is the
+        default one, a log record is created with a message that equals the
+        whole line.
+        """
+        for pattern in ["{message}", "{Y}-{m}-{d} {H}:{M}:{S} {message}"]:
+            self.handler.flush()
+            self.parser.pattern = pattern
+            self.parser.dataReceived(b"hello world!\n")
+            [record] = self.handler.buffer
+            self.assertEqual("NOTSET", record.levelname)
+            self.assertEqual(0, record.levelno)
+            self.assertIsNone(record.name)
+            self.assertEqual("hello world!", record.msg)
+
+    def test_default_pattern_custom_message(self):
+        """
+        With the default pattern, a custom substitution for the message group
+        is still honoured.
+        """
+        self.parser.substitutions = dict(
+            self.parser.substitutions,
+            message=r"(?:\[.*\] )?(?P<message>.+)")
+        self.parser.dataReceived(b"[app] hello world!\n")
         [record] = self.handler.buffer
-        self.assertEqual("NOTSET", record.levelname)
-        self.assertEqual(0, record.levelno)
-        self.assertIsNone(record.name)
         self.assertEqual("hello world!", record.msg)
 
+    def test_pattern_compiled_once(self):
+        """
+        The regex for a pattern is compiled when the first line is received,
+        and shared by parsers using the same pattern.
+        """
+        _compilePattern.cache_clear()
+        self.addCleanup(_compilePattern.cache_clear)
+        pattern = "{Y}-{m}-{d} {message}"
+        self.parser.pattern = pattern
+        other = ServiceOutputParser(pattern=pattern)
+        other.makeConnection(StringTransport())
+        self.assertEqual(pattern, other.pattern)
+
+        self.parser.dataReceived(b"2016-11-14 hi\n")
+        [record] = self.handler.buffer
+        self.assertEqual("hi", record.msg)
+        self.handler.flush()
+
+        # Further lines and parsers don't compile the pattern again.
+        self.parser.dataReceived(b"2016-11-15 hi\n")
+        other.dataReceived(b"2016-11-16 hi\n")
+        info = _compilePattern.cache_info()
+        self.assertEqual((1, 1), (info.hits, info.misses))
+
+    def test_substitutions_changed(self):
+        """
+        If the substitutions get replaced after the pattern was set, even
+        after some lines were received, the new ones are used.
+        """
+        self.parser.pattern = "{name} {message}"
+        self.parser.dataReceived(b"logger hi there\n")
+        [record] = self.handler.buffer
+        self.assertEqual("logger hi", record.name)
+        self.handler.flush()
+
+        self.parser.substitutions = dict(
+            self.parser.substitutions, name="(?P<name>[a-z]+)")
+        self.parser.dataReceived(b"logger hi there\n")
+        [record] = self.handler.buffer
+        self.assertEqual("logger", record.name)
+        self.assertEqual("hi there", record.msg)
+
     def test_truncated(self):
         """
         If a line exceeds `MAX_LENGTH`, it will be truncated.
@@ -438,3 +596,21 @@ class ServiceOutputParserTest(TestCase):
         # If a further match is found, the callback is *not* fired.
         self.parser.dataReceived(b"hello world!\n")
         self.assertEqual([None], tokens)
+
+    def test_when_line_contains_multiple(self):
+        """
+        All callbacks whose text is contained in a line get fired, while the
+        others are left pending.
+        """
+        fired = []
+        self.parser.whenLineContains("hello", lambda: fired.append("hello"))
+        self.parser.whenLineContains("world", lambda: fired.append("world"))
+        self.parser.whenLineContains("a.b", lambda: fired.append("a.b"))
+        self.parser.dataReceived(b"hello world!\n")
+        self.assertEqual(["hello", "world"], fired)
+
+        # Texts are matched literally
+        self.parser.dataReceived(b"axb\n")
+        self.assertEqual(["hello", "world"], fired)
+        self.parser.dataReceived(b"a.b\n")
+        self.assertEqual(["hello", "world", "a.b"], fired)